@@ -0,0 +1,74 @@
+"""
+Jobs/sec of TTSPipeline on StubBackend as more scripts are synthesized at
+once, with the tts_batch_size it reaches, with and without batching.
+
+The stub charges --batch-ms per generate_batch call plus --chunk-ms per
+chunk in it, the shape of a GPU model's cost. Every script is distinct,
+so the chunk cache never hits.
+
+Run from ai_audio/:
+
+    python -m bench.tts
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tts_pipeline import BATCH_SIZE, StubBackend, TTSPipeline
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument("--jobs", type=int, default=16)
+parser.add_argument("--levels", default="1,4,16", help="comma-separated numbers of concurrent scripts")
+parser.add_argument("--sentences", type=int, default=6, help="sentences per script")
+parser.add_argument("--batch-ms", type=float, default=50.0, help="stub cost per generate_batch call")
+parser.add_argument("--chunk-ms", type=float, default=10.0, help="stub cost per chunk in a batch")
+parser.add_argument("--max-batch", type=int, default=8)
+parser.add_argument("--window-ms", type=float, default=50.0, help="batch window")
+args = parser.parse_args()
+
+
+def script(n):
+    return " ".join(
+        f"Script {n} sentence {i} is long enough to be spoken on its own." for i in range(args.sentences)
+    )
+
+
+def batch_stats():
+    """(batches, chunks) observed by the tts_batch_size histogram so far."""
+    samples = {s.name: s.value for s in BATCH_SIZE.collect()[0].samples}
+    return samples["tts_batch_size_count"], samples["tts_batch_size_sum"]
+
+
+def run(pipeline, concurrency, offset):
+    batches, chunks = batch_stats()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        wavs = list(pool.map(pipeline.synthesize, [script(offset + n) for n in range(args.jobs)]))
+    elapsed = time.perf_counter() - start
+    assert all(len(wav) for wav in wavs)
+    batches_after, chunks_after = batch_stats()
+    return args.jobs / elapsed, (chunks_after - chunks) / (batches_after - batches)
+
+
+def main():
+    backend = StubBackend(batch_seconds=args.batch_ms / 1000, chunk_seconds=args.chunk_ms / 1000)
+    variants = (
+        ("unbatched", TTSPipeline(backend, {"model": "stub"}, max_batch=1, batch_window=0)),
+        (f"max_batch={args.max_batch}, {args.window_ms} ms window",
+         TTSPipeline(backend, {"model": "stub"}, max_batch=args.max_batch, batch_window=args.window_ms / 1000)),
+    )
+    print(
+        f"{args.jobs} scripts of {args.sentences} sentences, "
+        f"stub {args.batch_ms} ms per batch + {args.chunk_ms} ms per chunk"
+    )
+    offset = 0
+    for name, pipeline in variants:
+        for level in args.levels.split(","):
+            rate, batch_size = run(pipeline, int(level), offset)
+            offset += args.jobs
+            print(f"{name:<36} {level:>3} concurrent {rate:8.2f} jobs/s   tts_batch_size {batch_size:5.2f}")
+
+
+if __name__ == "__main__":
+    main()
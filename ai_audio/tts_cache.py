@@ -0,0 +1,144 @@
+# tts_cache.py
+
+import hashlib
+import json
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from minio.commonconfig import CopySource
+from minio.error import S3Error
+from prometheus_client import Counter, Gauge
+
+CACHE_REQUESTS = Counter("tts_cache_requests_total", "TTS output cache lookups", ["result"])
+CACHE_BYTES = Gauge("tts_cache_bytes", "Bytes held in the TTS output cache")
+CACHE_ENTRIES = Gauge("tts_cache_entries", "Entries held in the TTS output cache")
+
+
+def normalize_text(text):
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+def cache_key(text, voice_audio, params):
+    """
+    Content hash of everything that determines the generated audio: the
+    normalized text, the voice-conditioning clip and the model/generation
+    parameters.
+    """
+    h = hashlib.sha256()
+    h.update(normalize_text(text).encode("utf-8"))
+    h.update(b"\0")
+    h.update(hashlib.sha256(voice_audio or b"").digest())
+    h.update(json.dumps(params, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+class TTSCache:
+    """
+    Generated audio stored in a MinIO bucket under its cache key, with an
+    in-memory LRU index of (size, created) in front so lookups do not hit
+    MinIO. Entries older than `ttl` seconds are dropped on lookup and the
+    least recently used entries are removed once the cache holds more than
+    `max_bytes`. Hits and stores are server-side copies between the cache
+    and the job's own object, so evicting an entry never breaks a job.
+    """
+
+    def __init__(self, minio_client, bucket, max_bytes, ttl):
+        self.minio_client = minio_client
+        self.bucket = bucket
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._index = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Seed the index from the objects already in the bucket."""
+        if not self.minio_client.bucket_exists(self.bucket):
+            self.minio_client.make_bucket(self.bucket)
+        objects = sorted(
+            self.minio_client.list_objects(self.bucket),
+            key=lambda o: o.last_modified
+        )
+        with self._lock:
+            for obj in objects:
+                self._add(obj.object_name, obj.size, obj.last_modified.timestamp())
+        self._evict()
+
+    def _add(self, key, size, created):
+        if key in self._index:
+            self._bytes -= self._index.pop(key)[0]
+        self._index[key] = (size, created)
+        self._bytes += size
+        CACHE_BYTES.set(self._bytes)
+        CACHE_ENTRIES.set(len(self._index))
+
+    def _drop(self, key):
+        """Unindex an entry; call with the lock held, then _remove() it outside."""
+        size, _ = self._index.pop(key)
+        self._bytes -= size
+        CACHE_BYTES.set(self._bytes)
+        CACHE_ENTRIES.set(len(self._index))
+
+    def _remove(self, keys):
+        for key in keys:
+            try:
+                self.minio_client.remove_object(self.bucket, key)
+            except S3Error as e:
+                print(f"tts_cache: Failed to remove {key}: {e}")
+
+    def _evict(self):
+        dropped = []
+        with self._lock:
+            while self._bytes > self.max_bytes and self._index:
+                key = next(iter(self._index))
+                self._drop(key)
+                dropped.append(key)
+        self._remove(dropped)
+
+    def fetch(self, key, bucket, object_name):
+        """Copy a cached entry to bucket/object_name. Returns False on a miss."""
+        expired = False
+        with self._lock:
+            entry = self._index.get(key)
+            if entry and time.time() - entry[1] > self.ttl:
+                self._drop(key)
+                entry = None
+                expired = True
+            if entry:
+                self._index.move_to_end(key)
+        if expired:
+            self._remove([key])
+        if not entry:
+            CACHE_REQUESTS.labels("miss").inc()
+            return False
+        try:
+            self.minio_client.copy_object(bucket, object_name, CopySource(self.bucket, key))
+        except S3Error as e:
+            print(f"tts_cache: Cached entry {key} unavailable: {e}")
+            with self._lock:
+                dropped = key in self._index
+                if dropped:
+                    self._drop(key)
+            if dropped:
+                self._remove([key])
+            CACHE_REQUESTS.labels("miss").inc()
+            return False
+        CACHE_REQUESTS.labels("hit").inc()
+        return True
+
+    def store(self, key, bucket, object_name, size):
+        """Add bucket/object_name to the cache under `key`."""
+        try:
+            self.minio_client.copy_object(self.bucket, key, CopySource(bucket, object_name))
+        except S3Error as e:
+            print(f"tts_cache: Failed to store {key}: {e}")
+            return
+        with self._lock:
+            self._add(key, size, time.time())
+        self._evict()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._index), "bytes": self._bytes}
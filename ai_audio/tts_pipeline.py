@@ -0,0 +1,293 @@
+# tts_pipeline.py
+
+import os
+import re
+import json
+import threading
+import time
+import queue
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+from prometheus_client import Counter, Histogram
+
+from tts_cache import cache_key
+
+CHUNK_CACHE_REQUESTS = Counter("tts_chunk_cache_requests_total", "TTS chunk cache lookups", ["result"])
+BATCH_SIZE = Histogram(
+    "tts_batch_size",
+    "Chunks generated per TTS batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…。！？])\s+")
+_CLAUSE_END = re.compile(r"(?<=[,;:])\s+")
+# A full stop after these does not end the sentence.
+_ABBREVIATIONS = {
+    "mr.", "mrs.", "ms.", "dr.", "prof.", "st.", "jr.", "sr.", "vs.",
+    "etc.", "e.g.", "i.e.", "no.", "fig.", "approx.", "inc.", "ltd.",
+}
+
+
+def _split_long(sentence, max_chars):
+    """Split a sentence longer than max_chars on clause breaks, then words."""
+    pieces = []
+    for clause in _CLAUSE_END.split(sentence):
+        while len(clause) > max_chars:
+            cut = clause.rfind(" ", 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            pieces.append(clause[:cut].strip())
+            clause = clause[cut:].strip()
+        if clause:
+            pieces.append(clause)
+    return pieces
+
+
+def _sentences(text, min_chars, max_chars):
+    """
+    Split on sentence ends, rejoining pieces cut after an abbreviation
+    ("Mr. Smith") and merging pieces shorter than min_chars into the next
+    (the last one into the previous), as long as the result fits in
+    max_chars.
+    """
+    sentences = []
+    for piece in _SENTENCE_END.split(text):
+        if sentences and len(sentences[-1]) + 1 + len(piece) <= max_chars and (
+            len(sentences[-1]) < min_chars
+            or sentences[-1].rsplit(" ", 1)[-1].lower() in _ABBREVIATIONS
+        ):
+            sentences[-1] = f"{sentences[-1]} {piece}"
+        else:
+            sentences.append(piece)
+    # A short last sentence has no next one to join.
+    if len(sentences) > 1 and len(sentences[-1]) < min_chars \
+            and len(sentences[-2]) + 1 + len(sentences[-1]) <= max_chars:
+        sentences[-2:] = [f"{sentences[-2]} {sentences[-1]}"]
+    return sentences
+
+
+def split_text(text, max_chars=300, min_chars=20):
+    """
+    Split text into one chunk per sentence, breaking sentences longer than
+    max_chars on clauses and then words. Chunks do not depend on their
+    neighbours (except very short sentences, which are spoken together
+    with the next one), so editing one sentence leaves the cache entries
+    of the other chunks valid.
+    """
+    chunks = []
+    for sentence in _sentences(" ".join(text.split()), min_chars, max_chars):
+        if len(sentence) > max_chars:
+            chunks.extend(_split_long(sentence, max_chars))
+        elif sentence:
+            chunks.append(sentence)
+    return chunks
+
+
+def crossfade_concat(chunks, sample_rate, crossfade_ms=30):
+    """Concatenate 1-D float waveforms with an equal-power crossfade."""
+    if not chunks:
+        return np.zeros(0, dtype=np.float32)
+    fade = int(sample_rate * crossfade_ms / 1000)
+    out = chunks[0].astype(np.float32)
+    for chunk in chunks[1:]:
+        chunk = chunk.astype(np.float32)
+        n = min(fade, len(out), len(chunk))
+        if n == 0:
+            out = np.concatenate([out, chunk])
+            continue
+        t = np.linspace(0, np.pi / 2, n, dtype=np.float32)
+        overlap = out[-n:] * np.cos(t) + chunk[:n] * np.sin(t)
+        out = np.concatenate([out[:-n], overlap, chunk[n:]])
+    return out
+
+
+class ChatterboxBackend:
+    """
+    Chatterbox keeps the active speaker conditioning on the model (`conds`),
+    so extraction and generation are serialized on `lock` and each batch
+    installs its speaker's conditionals before generating. ChatterboxTTS
+    has no batched generate; without one, a "batch" is generated one chunk
+    after another and `batched` is False.
+    """
+
+    def __init__(self, model, params):
+        from chatterbox.tts import Conditionals
+
+        self.model = model
+        self.params = params
+        self.batched = hasattr(model, "generate_batch")
+        self.sample_rate = model.sr
+        self.default_conds = model.conds
+        self.lock = threading.Lock()
+        self._conditionals_cls = Conditionals
+
+    def extract_conditionals(self, wav_path, exaggeration):
+        with self.lock:
+            self.model.prepare_conditionals(wav_path, exaggeration=exaggeration)
+            return self.model.conds
+
+    def save_conditionals(self, conds, path):
+        conds.save(path)
+
+    def load_conditionals(self, path):
+        return self._conditionals_cls.load(path, map_location=self.model.device).to(self.model.device)
+
+    def generate_batch(self, texts, conds=None):
+        with self.lock:
+            self.model.conds = conds if conds is not None else self.default_conds
+            if hasattr(self.model, "generate_batch"):
+                wavs = self.model.generate_batch(texts, **self.params)
+            else:
+                wavs = [self.model.generate(text, **self.params) for text in texts]
+        return [wav.squeeze(0).detach().cpu().numpy() for wav in wavs]
+
+
+class StubBackend:
+    """
+    CPU stand-in: a tone whose length follows the text length, with a fixed
+    per-batch cost plus a per-chunk cost, so batching and stitching can be
+    benchmarked without a GPU. Conditioning extraction costs
+    `conditioning_seconds` and yields a pitch derived from the clip.
+    """
+
+    batched = True
+
+    def __init__(self, sample_rate=24000, seconds_per_char=0.06,
+                 batch_seconds=0.2, chunk_seconds=0.05, conditioning_seconds=1.0):
+        self.sample_rate = sample_rate
+        self.seconds_per_char = seconds_per_char
+        self.batch_seconds = batch_seconds
+        self.chunk_seconds = chunk_seconds
+        self.conditioning_seconds = conditioning_seconds
+
+    def extract_conditionals(self, wav_path, exaggeration):
+        time.sleep(self.conditioning_seconds)
+        return {"pitch": 150 + os.path.getsize(wav_path) % 200}
+
+    def save_conditionals(self, conds, path):
+        with open(path, "w") as f:
+            json.dump(conds, f)
+
+    def load_conditionals(self, path):
+        with open(path) as f:
+            return json.load(f)
+
+    def generate_batch(self, texts, conds=None):
+        time.sleep(self.batch_seconds + self.chunk_seconds * len(texts))
+        pitch = conds["pitch"] if conds else 220
+        wavs = []
+        for text in texts:
+            n = int(len(text) * self.seconds_per_char * self.sample_rate)
+            t = np.arange(n, dtype=np.float32) / self.sample_rate
+            wavs.append(0.1 * np.sin(2 * np.pi * pitch * t))
+        return wavs
+
+
+class ChunkCache:
+    """In-memory LRU of generated chunk waveforms, bounded by bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            wav = self._entries.get(key)
+            if wav is not None:
+                self._entries.move_to_end(key)
+        CHUNK_CACHE_REQUESTS.labels("hit" if wav is not None else "miss").inc()
+        return wav
+
+    def put(self, key, wav):
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = wav
+            self._bytes += wav.nbytes
+            while self._bytes > self.max_bytes and self._entries:
+                _, old = self._entries.popitem(last=False)
+                self._bytes -= old.nbytes
+
+
+class TTSPipeline:
+    """
+    Splits scripts into sentence chunks and generates the chunks that are not
+    cached on a single generation thread, which batches chunks from every
+    concurrently running job: it waits up to `batch_window` seconds for up
+    to `max_batch` chunks, then calls the backend once per speaker. For a
+    backend that cannot generate a batch at once (`batched` False, as with
+    ChatterboxTTS today) there is nothing to gain from waiting, so the
+    window is dropped and the thread just takes whatever chunks are queued.
+    """
+
+    def __init__(self, backend, params, voice_cache=None, max_chars=300, max_batch=8,
+                 batch_window=0.05, crossfade_ms=30, chunk_cache_bytes=512 * 1024 * 1024):
+        self.backend = backend
+        self.voice_cache = voice_cache
+        self.params = params
+        self.max_chars = max_chars
+        self.max_batch = max_batch
+        self.batch_window = batch_window if getattr(backend, "batched", True) else 0.0
+        self.crossfade_ms = crossfade_ms
+        self.chunk_cache = ChunkCache(chunk_cache_bytes)
+        self._pending = queue.Queue()
+        threading.Thread(target=self._generation_loop, daemon=True).start()
+
+    @property
+    def sample_rate(self):
+        return self.backend.sample_rate
+
+    def _generation_loop(self):
+        while True:
+            batch = [self._pending.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            BATCH_SIZE.observe(len(batch))
+
+            by_voice = OrderedDict()
+            for text, voice_key, conds, future in batch:
+                by_voice.setdefault(voice_key, (conds, []))[1].append((text, future))
+            for conds, items in by_voice.values():
+                try:
+                    wavs = self.backend.generate_batch([text for text, _ in items], conds)
+                except Exception as e:
+                    for _, future in items:
+                        future.set_exception(e)
+                    continue
+                for (_, future), wav in zip(items, wavs):
+                    future.set_result(wav)
+
+    def synthesize(self, text, voice_audio=None, voice_suffix=".wav"):
+        """
+        Return the waveform for `text` as a 1-D float32 array at sample_rate,
+        spoken in the voice of the `voice_audio` reference clip if given.
+        """
+        chunks = split_text(text, self.max_chars)
+        keys = [cache_key(chunk, voice_audio, self.params) for chunk in chunks]
+        wavs = [self.chunk_cache.get(key) for key in keys]
+
+        voice_key, conds = None, None
+        futures = {}
+        for i, (chunk, wav) in enumerate(zip(chunks, wavs)):
+            if wav is None:
+                if voice_audio and self.voice_cache and conds is None:
+                    voice_key, conds = self.voice_cache.get(voice_audio, voice_suffix)
+                futures[i] = Future()
+                self._pending.put((chunk, voice_key, conds, futures[i]))
+
+        for i, future in futures.items():
+            wavs[i] = future.result()
+            self.chunk_cache.put(keys[i], wavs[i])
+
+        return crossfade_concat(wavs, self.sample_rate, self.crossfade_ms)
@@ -0,0 +1,66 @@
+# voice_cache.py
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from prometheus_client import Counter
+
+VOICE_CACHE_REQUESTS = Counter(
+    "tts_voice_cache_requests_total",
+    "Speaker conditioning lookups",
+    ["result"]
+)
+
+
+class VoiceCache:
+    """
+    Speaker conditioning computed from a reference clip, cached per content
+    hash of the clip (and exaggeration) in an in-memory LRU backed by a disk
+    directory, so repeated jobs for the same speaker skip the extraction.
+    """
+
+    def __init__(self, backend, cache_dir, exaggeration, max_entries=64):
+        self.backend = backend
+        self.cache_dir = cache_dir
+        self.exaggeration = exaggeration
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, reference_audio):
+        h = hashlib.sha256(reference_audio).hexdigest()
+        return f"{h}-{self.exaggeration}"
+
+    def get(self, reference_audio, suffix=".wav"):
+        """Return (key, conditionals) for a reference clip."""
+        key = self.key(reference_audio)
+        with self._lock:
+            conds = self._entries.get(key)
+            if conds is not None:
+                self._entries.move_to_end(key)
+                VOICE_CACHE_REQUESTS.labels("memory").inc()
+                return key, conds
+
+        path = os.path.join(self.cache_dir, f"{key}.pt")
+        if os.path.exists(path):
+            conds = self.backend.load_conditionals(path)
+            VOICE_CACHE_REQUESTS.labels("disk").inc()
+        else:
+            with tempfile.NamedTemporaryFile(suffix=suffix) as f:
+                f.write(reference_audio)
+                f.flush()
+                conds = self.backend.extract_conditionals(f.name, self.exaggeration)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            self.backend.save_conditionals(conds, tmp_path)
+            os.replace(tmp_path, path)
+            VOICE_CACHE_REQUESTS.labels("miss").inc()
+
+        with self._lock:
+            self._entries[key] = conds
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return key, conds
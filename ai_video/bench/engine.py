@@ -0,0 +1,127 @@
+"""
+Lifecycle costs of the resident InferenceEngine on CPU, with FakeBackend
+standing in for LatentSync: --load-seconds for imports and checkpoint
+loads, --step-ms per denoising step.
+
+Reports the cold first job, the warm per-job overhead (wall time beyond
+the backend's own inference), the cost of evicting one checkpoint for
+another, and a process per job running the CLI, as every job did before
+the engine.
+
+Run from ai_video/:
+
+    python -m bench.engine
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from inference_engine import FakeBackend, InferenceEngine
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument("--jobs", type=int, default=50)
+parser.add_argument("--load-seconds", type=float, default=2.0, help="simulated import and checkpoint load")
+parser.add_argument("--step-ms", type=float, default=1.0, help="simulated denoising step")
+parser.add_argument("--steps", type=int, default=20, help="inference_steps per job")
+parser.add_argument("--cli-jobs", type=int, default=5, help="jobs for the process-per-job row")
+args = parser.parse_args()
+
+CHECKPOINTS = (
+    ("configs/unet/stage2.yaml", "checkpoints/latentsync_unet.pt"),
+    ("configs/unet/stage2_512.yaml", "checkpoints/latentsync_unet_512.pt"),
+)
+
+# What `python -m scripts.inference` did for every job: start an
+# interpreter, load everything, render once and exit.
+CLI_JOB = """
+import sys
+from inference_engine import FakeBackend
+backend = FakeBackend(float(sys.argv[1]), float(sys.argv[2]))
+handle = backend.load("configs/unet/stage2.yaml", "checkpoints/latentsync_unet.pt")
+backend.infer(handle, sys.argv[3], sys.argv[4], sys.argv[5], int(sys.argv[6]), 1.5, sys.argv[7])
+"""
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def per_job(engine, jobs):
+    """Wall and backend inference seconds per job for running `jobs`."""
+    before = engine.stats()["infer_seconds"]
+    wall = timed(lambda: [job() for job in jobs])
+    return wall / len(jobs), (engine.stats()["infer_seconds"] - before) / len(jobs)
+
+
+def main():
+    work = tempfile.mkdtemp(prefix="bench_engine_")
+    video = os.path.join(work, "in.mp4")
+    audio = os.path.join(work, "in.wav")
+    out = os.path.join(work, "out.mp4")
+    for path in (video, audio):
+        with open(path, "wb") as f:
+            f.write(os.urandom(256 * 1024))
+    infer_seconds = args.steps * args.step_ms / 1000
+
+    def job(engine, checkpoint):
+        return lambda: engine.run(video, audio, out, *checkpoint, args.steps, 1.5, work)
+
+    # The engine logs every load and eviction; keep the table readable.
+    report = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    report.write(
+        f"load {args.load_seconds} s, {args.steps} steps x {args.step_ms} ms "
+        f"= {infer_seconds * 1000:.1f} ms simulated inference per job\n"
+    )
+    try:
+        backend = FakeBackend(args.load_seconds, args.step_ms / 1000)
+        engine = InferenceEngine(backend, max_loaded=1)
+        cold, _ = per_job(engine, [job(engine, CHECKPOINTS[0])])
+        report.write(f"{'cold first job':<40} {cold * 1000:10.1f} ms\n")
+        warm, infer = per_job(engine, [job(engine, CHECKPOINTS[0])] * args.jobs)
+        report.write(f"{'warm job':<40} {warm * 1000:10.1f} ms   overhead {(warm - infer) * 1000:.3f} ms\n")
+
+        # Alternating checkpoints with room for one: every job evicts.
+        switches = max(args.jobs // 10, 2)
+        evicting, infer = per_job(engine, [job(engine, CHECKPOINTS[i % 2]) for i in range(1, switches + 1)])
+        report.write(
+            f"{'checkpoint switch, max_loaded=1':<40} {evicting * 1000:10.1f} ms   "
+            f"eviction + reload {(evicting - infer) * 1000:.1f} ms\n"
+        )
+
+        engine = InferenceEngine(backend, max_loaded=2)
+        for checkpoint in CHECKPOINTS:
+            engine.warm(*checkpoint)
+        resident, infer = per_job(engine, [job(engine, CHECKPOINTS[i % 2]) for i in range(switches)])
+        report.write(
+            f"{'checkpoint switch, max_loaded=2':<40} {resident * 1000:10.1f} ms   "
+            f"overhead {(resident - infer) * 1000:.3f} ms\n"
+        )
+
+        env = dict(os.environ, PYTHONPATH=os.getcwd())
+        cli = timed(lambda: [
+            subprocess.run(
+                [sys.executable, "-c", CLI_JOB, str(args.load_seconds), str(args.step_ms / 1000),
+                 video, audio, out, str(args.steps), work],
+                env=env, check=True
+            )
+            for _ in range(args.cli_jobs)
+        ]) / args.cli_jobs
+        report.write(
+            f"{'process per job (before)':<40} {cli * 1000:10.1f} ms   "
+            f"overhead {(cli - infer_seconds) * 1000:.1f} ms\n"
+        )
+    finally:
+        sys.stdout = report
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
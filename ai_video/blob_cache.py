@@ -0,0 +1,135 @@
+# blob_cache.py
+
+import hashlib
+import os
+import shutil
+import threading
+
+from prometheus_client import Counter
+
+BLOB_CACHE_REQUESTS = Counter("blob_cache_requests_total", "MinIO blob cache lookups", ["result"])
+BLOB_CACHE_BYTES = Counter("blob_cache_bytes_total", "Bytes served by the MinIO blob cache", ["source"])
+
+
+class BlobCache:
+    """
+    Node-local cache of MinIO objects, one file per object path and ETag, so
+    an overwritten object is never served stale. The directory may be shared
+    by several processes: files are written under a temporary name and
+    renamed into place, hits touch the file, and each download evicts the
+    least recently used files above `max_bytes`.
+    """
+
+    def __init__(self, client, cache_dir, max_bytes, chunk_size=1024 * 1024):
+        self.client = client
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self._inflight = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, bucket, obj, etag):
+        name = hashlib.sha256(f"{bucket}/{obj}@{etag}".encode()).hexdigest()
+        return os.path.join(self.cache_dir, name)
+
+    def fetch(self, minio_path):
+        """Return the local path of a cached copy of "bucket/object_name"."""
+        bucket, obj = minio_path.split("/", 1)
+        stat = self.client.stat_object(bucket, obj)
+        path = self._path(bucket, obj, stat.etag)
+
+        while True:
+            with self._lock:
+                if os.path.exists(path):
+                    try:
+                        os.utime(path)
+                    except FileNotFoundError:
+                        continue
+                    BLOB_CACHE_REQUESTS.labels("hit").inc()
+                    BLOB_CACHE_BYTES.labels("cache").inc(stat.size)
+                    return path
+                event = self._inflight.get(path)
+                if event is None:
+                    event = self._inflight[path] = threading.Event()
+                    break
+            # Another thread is downloading the same object.
+            event.wait()
+
+        try:
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            response = self.client.get_object(bucket, obj)
+            try:
+                with open(tmp_path, "wb") as f:
+                    for chunk in response.stream(self.chunk_size):
+                        f.write(chunk)
+                os.replace(tmp_path, path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            finally:
+                response.close()
+                response.release_conn()
+            BLOB_CACHE_REQUESTS.labels("miss").inc()
+            BLOB_CACHE_BYTES.labels("minio").inc(stat.size)
+        finally:
+            with self._lock:
+                del self._inflight[path]
+            event.set()
+
+        self._evict(keep=path)
+        return path
+
+    def link(self, minio_path, dest):
+        """
+        Place the object at `dest`: a hardlink when dest is on the cache's
+        filesystem, a copy otherwise. Evicting the cache entry later does
+        not affect dest.
+        """
+        for _ in range(3):
+            path = self.fetch(minio_path)
+            try:
+                os.link(path, dest)
+                return dest
+            except FileNotFoundError:
+                # Evicted by another process between fetch and link.
+                continue
+            except OSError:
+                shutil.copyfile(path, dest)
+                return dest
+        raise RuntimeError(f"Could not place {minio_path} at {dest}")
+
+    def read(self, minio_path):
+        """Return the object's bytes."""
+        for _ in range(3):
+            try:
+                with open(self.fetch(minio_path), "rb") as f:
+                    return f.read()
+            except FileNotFoundError:
+                # Evicted by another process between fetch and open.
+                continue
+        raise RuntimeError(f"Could not read {minio_path}")
+
+    def _evict(self, keep=None):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".tmp"):
+                continue
+            full = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(full)
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, full))
+        total = sum(size for _, size, _ in entries)
+        for _, size, full in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if full == keep:
+                continue
+            try:
+                os.remove(full)
+            except FileNotFoundError:
+                pass
+            total -= size
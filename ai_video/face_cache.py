@@ -0,0 +1,91 @@
+# face_cache.py
+
+import hashlib
+import os
+import threading
+
+from prometheus_client import Counter
+
+FACE_CACHE_REQUESTS = Counter(
+    "latentsync_face_cache_requests_total",
+    "Face preprocessing cache lookups",
+    ["result"]
+)
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class FaceCache:
+    """
+    Disk cache of LatentSync's per-frame face preprocessing (aligned face
+    crops, boxes and affine matrices), one torch.save file per key. Reads
+    touch the file, and writes evict the least recently used files once the
+    directory exceeds `max_bytes`.
+    """
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        name = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{name}.pt")
+
+    def get(self, key):
+        import torch
+
+        path = self._path(key)
+        try:
+            value = torch.load(path, map_location="cpu", weights_only=False)
+        except FileNotFoundError:
+            FACE_CACHE_REQUESTS.labels("miss").inc()
+            return None
+        os.utime(path)
+        FACE_CACHE_REQUESTS.labels("hit").inc()
+        return value
+
+    def put(self, key, value):
+        import torch
+
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        torch.save(value, tmp_path)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith(".pt"):
+                    continue
+                try:
+                    st = os.stat(os.path.join(self.cache_dir, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, name))
+            total = sum(size for _, size, _ in entries)
+            for _, size, name in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+    def stats(self):
+        names = [n for n in os.listdir(self.cache_dir) if n.endswith(".pt")]
+        return {
+            "entries": len(names),
+            "bytes": sum(os.path.getsize(os.path.join(self.cache_dir, n)) for n in names),
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,374 @@
+# inference_engine.py
+
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+
+from face_cache import FaceCache, file_digest
+
+
+def _concat(a, b):
+    """Join two parts of an affine_transform_video result (tensor or list)."""
+    import torch
+
+    if isinstance(a, torch.Tensor):
+        return torch.cat([a, b])
+    return list(a) + list(b)
+
+
+class LatentSyncBackend:
+    """
+    Loads LatentSync the same way scripts/inference.py does, but keeps the
+    resulting pipeline in memory so later jobs skip the imports and the
+    UNet/VAE/whisper/face-detector loads. With a `face_cache`, the per-frame
+    face detection and alignment of an input video is computed once and
+    reused by later runs on the same video; within a group run it is shared
+    even without one.
+    """
+
+    def __init__(self, root, face_cache=None):
+        self.root = root
+        self.face_cache = face_cache
+        # LatentSync resolves configs and auxiliary checkpoints relative to
+        # its repository root, as the CLI did when run with cwd=root.
+        os.chdir(root)
+
+    def load(self, unet_config_path, inference_ckpt_path):
+        import torch
+        from omegaconf import OmegaConf
+        from diffusers import AutoencoderKL, DDIMScheduler
+        from latentsync.models.unet import UNet3DConditionModel
+        from latentsync.pipelines.lipsync_pipeline import LipsyncPipeline
+        from latentsync.whisper.audio2feature import Audio2Feature
+
+        config = OmegaConf.load(unet_config_path)
+        is_fp16_supported = torch.cuda.is_available() and torch.cuda.get_device_capability()[0] > 7
+        dtype = torch.float16 if is_fp16_supported else torch.float32
+
+        scheduler = DDIMScheduler.from_pretrained("configs")
+        if config.model.cross_attention_dim == 768:
+            whisper_model_path = "checkpoints/whisper/small.pt"
+        else:
+            whisper_model_path = "checkpoints/whisper/tiny.pt"
+        audio_encoder = Audio2Feature(
+            model_path=whisper_model_path,
+            device="cuda",
+            num_frames=config.data.num_frames,
+            audio_feat_length=config.data.audio_feat_length,
+        )
+        vae = AutoencoderKL.from_pretrained("stabilityai/sd-vae-ft-mse", torch_dtype=dtype)
+        vae.config.scaling_factor = 0.18215
+        vae.config.shift_factor = 0
+        unet, _ = UNet3DConditionModel.from_pretrained(
+            OmegaConf.to_container(config.model),
+            inference_ckpt_path,
+            device="cpu",
+        )
+        unet = unet.to(dtype=dtype)
+        pipeline = LipsyncPipeline(
+            vae=vae,
+            audio_encoder=audio_encoder,
+            unet=unet,
+            scheduler=scheduler,
+        ).to("cuda")
+        handle = {"pipeline": pipeline, "config": config, "dtype": dtype}
+        self._cache_face_preprocessing(handle)
+        return handle
+
+    def _cache_face_preprocessing(self, handle):
+        """
+        Route the pipeline's affine_transform_video through the current
+        group's results and the face cache, keyed by the video being
+        rendered (set by infer) and the crop resolution. The pipeline
+        passes a prefix of the decoded frames as long as the audio, and
+        alignment is per frame, so one entry serves every script length:
+        lookups slice it, and a longer prefix only aligns the missing
+        frames and extends the entry.
+        """
+        pipeline = handle["pipeline"]
+        transform = pipeline.affine_transform_video
+        resolution = handle["config"].data.resolution
+
+        def cached_transform(frames, *args, **kwargs):
+            video_key = handle.get("video_key")
+            if video_key is None or isinstance(frames, str):
+                return transform(frames, *args, **kwargs)
+            key = f"{video_key}:{resolution}"
+            group_faces = handle.get("group_faces")
+            entry = group_faces.get(key) if group_faces is not None else None
+            if entry is None and self.face_cache is not None:
+                entry = self.face_cache.get(key)
+            have = len(entry[0]) if entry is not None else 0
+            if have < len(frames):
+                tail = transform(frames[have:], *args, **kwargs)
+                entry = tail if entry is None else tuple(_concat(a, b) for a, b in zip(entry, tail))
+                if self.face_cache is not None:
+                    self.face_cache.put(key, entry)
+            if group_faces is not None:
+                group_faces[key] = entry
+            return tuple(part[:len(frames)] for part in entry)
+
+        pipeline.affine_transform_video = cached_transform
+
+    def infer(self, handle, video_path, audio_path, out_path, inference_steps, guidance_scale, temp_dir,
+              video_key=None):
+        import torch
+
+        config = handle["config"]
+        if self.face_cache is not None or video_key:
+            handle["video_key"] = video_key or file_digest(video_path)
+        torch.seed()
+        try:
+            handle["pipeline"](
+                video_path=video_path,
+                audio_path=audio_path,
+                video_out_path=out_path,
+                num_frames=config.data.num_frames,
+                num_inference_steps=inference_steps,
+                guidance_scale=guidance_scale,
+                weight_dtype=handle["dtype"],
+                width=config.data.resolution,
+                height=config.data.resolution,
+                mask_image_path=config.data.mask_image_path,
+                temp_dir=temp_dir,
+            )
+        finally:
+            handle.pop("video_key", None)
+
+    def infer_group(self, handle, video_path, audio_paths, out_paths, inference_steps, guidance_scale,
+                    temp_dir, video_key=None):
+        """
+        Render each audio against the same video. The video's face detection
+        and alignment runs once for the whole group. LipsyncPipeline denoises
+        one audio track per call, so the UNet passes themselves still run
+        per audio. Returns one exception or None per audio.
+        """
+        video_key = video_key or file_digest(video_path)
+        handle["group_faces"] = {}
+        errors = []
+        try:
+            for i, (audio_path, out_path) in enumerate(zip(audio_paths, out_paths)):
+                try:
+                    self.infer(
+                        handle, video_path, audio_path, out_path, inference_steps, guidance_scale,
+                        os.path.join(temp_dir, str(i)), video_key
+                    )
+                    errors.append(None)
+                except Exception as e:
+                    errors.append(e)
+        finally:
+            handle.pop("group_faces", None)
+        return errors
+
+    def unload(self, handle):
+        import torch
+
+        handle.clear()
+        torch.cuda.empty_cache()
+
+
+class FakeBackend:
+    """
+    CPU stand-in with configurable load and per-step cost; "inference" copies
+    the input video to the output path. Used to exercise the engine without
+    a GPU or the LatentSync checkout.
+    """
+
+    def __init__(self, load_seconds=5.0, step_seconds=0.01):
+        self.load_seconds = load_seconds
+        self.step_seconds = step_seconds
+
+    def load(self, unet_config_path, inference_ckpt_path):
+        time.sleep(self.load_seconds)
+        return {"unet_config_path": unet_config_path, "inference_ckpt_path": inference_ckpt_path}
+
+    def infer(self, handle, video_path, audio_path, out_path, inference_steps, guidance_scale, temp_dir,
+              video_key=None):
+        time.sleep(self.step_seconds * inference_steps)
+        shutil.copyfile(video_path, out_path)
+
+    def unload(self, handle):
+        handle.clear()
+
+
+class _Loaded:
+    def __init__(self):
+        self.handle = None
+        self.error = None
+        self.ready = threading.Event()
+        # Runs holding or waiting for this model; a pinned model is never
+        # evicted.
+        self.pins = 1
+        self.lock = threading.Lock()
+
+
+class InferenceEngine:
+    """
+    Keeps up to `max_loaded` models resident, keyed by
+    (unet_config_path, inference_ckpt_path, slot), evicting the least
+    recently used one that no run is using. Each inference slot gets its
+    own model instance; runs on the same instance are serialized. Loads and
+    unloads happen outside the engine lock, so one slot loading a
+    checkpoint does not stall the others.
+    """
+
+    def __init__(self, backend, max_loaded=1):
+        self.backend = backend
+        self.max_loaded = max_loaded
+        self._models = OrderedDict()
+        self._cond = threading.Condition()
+        self._stats = {
+            "loads": 0,
+            "evictions": 0,
+            "runs": 0,
+            "group_runs": 0,
+            "load_seconds": 0.0,
+            "infer_seconds": 0.0,
+        }
+
+    def _acquire(self, unet_config_path, inference_ckpt_path, slot=0):
+        """Return the slot's model for the checkpoint, loaded and pinned."""
+        key = (unet_config_path, inference_ckpt_path, slot)
+        evicted = []
+        with self._cond:
+            while True:
+                loaded = self._models.get(key)
+                if loaded is not None:
+                    self._models.move_to_end(key)
+                    loaded.pins += 1
+                    must_load = False
+                    break
+                if len(self._models) < self.max_loaded:
+                    loaded = self._models[key] = _Loaded()
+                    must_load = True
+                    break
+                # Make room among models no run is using; wait for one to
+                # be released if all are busy.
+                idle = [k for k, m in self._models.items() if m.pins == 0]
+                if idle:
+                    evicted.append((idle[0], self._models.pop(idle[0])))
+                else:
+                    self._cond.wait()
+
+        if not must_load:
+            loaded.ready.wait()
+            if loaded.error is not None:
+                self._release(loaded)
+                raise loaded.error
+            return loaded
+
+        for old_key, old in evicted:
+            self.backend.unload(old.handle)
+            print(f"inference_engine: Evicted {old_key}")
+        print(f"inference_engine: Loading {key}")
+        start = time.monotonic()
+        try:
+            loaded.handle = self.backend.load(unet_config_path, inference_ckpt_path)
+        except Exception as e:
+            loaded.error = e
+            with self._cond:
+                self._models.pop(key, None)
+            loaded.ready.set()
+            self._release(loaded)
+            raise
+        loaded.ready.set()
+        with self._cond:
+            self._stats["evictions"] += len(evicted)
+            self._stats["loads"] += 1
+            self._stats["load_seconds"] += time.monotonic() - start
+        return loaded
+
+    def _release(self, loaded):
+        with self._cond:
+            loaded.pins -= 1
+            self._cond.notify_all()
+
+    def warm(self, unet_config_path, inference_ckpt_path, slot=0):
+        self._release(self._acquire(unet_config_path, inference_ckpt_path, slot))
+
+    def run(self, video_path, audio_path, out_path, unet_config_path, inference_ckpt_path,
+            inference_steps, guidance_scale, temp_dir, slot=0, video_key=None):
+        """
+        Render out_path on the slot's model. `video_key` identifies the
+        input video for the face preprocessing cache; it defaults to a
+        content hash of video_path.
+        """
+        loaded = self._acquire(unet_config_path, inference_ckpt_path, slot)
+        try:
+            with loaded.lock:
+                start = time.monotonic()
+                self.backend.infer(
+                    loaded.handle, video_path, audio_path, out_path,
+                    inference_steps, guidance_scale, temp_dir, video_key
+                )
+                elapsed = time.monotonic() - start
+        finally:
+            self._release(loaded)
+        with self._cond:
+            self._stats["runs"] += 1
+            self._stats["infer_seconds"] += elapsed
+
+    def run_group(self, video_path, audio_paths, out_paths, unet_config_path, inference_ckpt_path,
+                  inference_steps, guidance_scale, temp_dir, slot=0, video_key=None):
+        """
+        Render one output per audio against the same video, holding the
+        slot's model for the whole group. Backends with infer_group share
+        the video-side work across the group; others run each audio on its
+        own. Returns one exception or None per audio.
+        """
+        loaded = self._acquire(unet_config_path, inference_ckpt_path, slot)
+        try:
+            with loaded.lock:
+                start = time.monotonic()
+                infer_group = getattr(self.backend, "infer_group", None)
+                if infer_group is not None:
+                    errors = infer_group(
+                        loaded.handle, video_path, audio_paths, out_paths,
+                        inference_steps, guidance_scale, temp_dir, video_key
+                    )
+                else:
+                    errors = []
+                    for i, (audio_path, out_path) in enumerate(zip(audio_paths, out_paths)):
+                        try:
+                            self.backend.infer(
+                                loaded.handle, video_path, audio_path, out_path,
+                                inference_steps, guidance_scale, os.path.join(temp_dir, str(i)), video_key
+                            )
+                            errors.append(None)
+                        except Exception as e:
+                            errors.append(e)
+                elapsed = time.monotonic() - start
+        finally:
+            self._release(loaded)
+        with self._cond:
+            self._stats["runs"] += len(audio_paths)
+            self._stats["group_runs"] += 1
+            self._stats["infer_seconds"] += elapsed
+        return errors
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats, loaded=[list(key) for key, m in self._models.items() if m.ready.is_set()])
+        face_cache = getattr(self.backend, "face_cache", None)
+        if face_cache is not None:
+            stats["face_cache"] = face_cache.stats()
+        return stats
+
+
+def engine_from_env():
+    backend_name = os.getenv("LATENTSYNC_BACKEND", "latentsync")
+    if backend_name == "fake":
+        backend = FakeBackend(
+            load_seconds=float(os.getenv("FAKE_LOAD_SECONDS", "5")),
+            step_seconds=float(os.getenv("FAKE_STEP_SECONDS", "0.01")),
+        )
+    else:
+        face_cache_bytes = int(os.getenv("FACE_CACHE_MAX_BYTES", str(20 * 1024 ** 3)))
+        face_cache = None
+        if face_cache_bytes > 0:
+            face_cache = FaceCache(os.getenv("FACE_CACHE_DIR", "/tmp/face_cache"), face_cache_bytes)
+        backend = LatentSyncBackend(os.getenv("LATENTSYNC_PATH", "/app/LatentSync"), face_cache)
+    max_loaded = int(os.getenv("LATENTSYNC_MAX_LOADED", os.getenv("VIDEO_SLOTS", "1")))
+    return InferenceEngine(backend, max_loaded=max_loaded)
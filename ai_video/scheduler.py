@@ -0,0 +1,177 @@
+# scheduler.py
+
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+
+from prometheus_client import Gauge, Histogram
+
+QUEUE_DEPTH = Gauge("video_scheduler_queue_depth", "Jobs waiting for an inference slot")
+BUSY_SLOTS = Gauge("video_scheduler_busy_slots", "Inference slots currently running a job")
+WAIT_SECONDS = Histogram(
+    "video_scheduler_wait_seconds",
+    "Time jobs waited for an inference slot",
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+)
+GROUP_SIZE = Histogram(
+    "video_scheduler_group_size",
+    "Jobs started together on one inference slot",
+    buckets=(1, 2, 3, 4, 6, 8, 12, 16)
+)
+
+
+def estimate_cost(video_seconds, audio_seconds, inference_steps):
+    """
+    LatentSync renders one frame per frame of audio (looping the video as
+    needed) and runs every frame through each denoising step, so cost is
+    measured in seconds of output times steps.
+    """
+    return max(video_seconds or 0.0, audio_seconds or 0.0, 1.0) * inference_steps
+
+
+class _Entry:
+    def __init__(self, seq, job_id, priority, tenant, cost, fn, group_key, group_item, group_fn):
+        self.seq = seq
+        self.job_id = job_id
+        self.priority = priority
+        self.tenant = tenant
+        self.cost = cost
+        self.fn = fn
+        self.group_key = group_key
+        self.group_item = group_item
+        self.group_fn = group_fn
+        self.enqueued_at = time.monotonic()
+        self.future = Future()
+
+
+class GpuScheduler:
+    """
+    Runs submitted jobs on `slots` inference slots, one job per slot.
+
+    A free slot takes the highest-priority waiting job. Among jobs of equal
+    priority it picks the tenant with the least accumulated cost (start-time
+    fair queueing), and within a tenant the oldest job. A tenant that was
+    idle re-enters at the lowest accumulated cost of the active tenants, so
+    it cannot bank credit while idle.
+
+    Jobs submitted with the same `group_key` run together: the slot that
+    picks one also takes other waiting jobs with that key, up to
+    `group_size` in all, and hands them to group_fn(slot, items). A group
+    runs its jobs one after another on one slot, so while other slots are
+    free the waiting jobs of a key are spread over them instead. Groups
+    are made only of jobs already waiting; a slot never idles to let one
+    grow.
+    """
+
+    def __init__(self, slots, group_size=1):
+        self.slots = slots
+        self.group_size = max(group_size, 1)
+        self._pending = []
+        self._usage = {}
+        self._running = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        for slot in range(slots):
+            threading.Thread(target=self._slot_loop, args=(slot,), daemon=True).start()
+
+    def submit(self, job_id, fn, priority=0, tenant=None, cost=1.0,
+               group_key=None, group_item=None, group_fn=None):
+        """
+        Queue fn(slot) for job_id; returns a Future with its result. With a
+        group_key, the job may instead run as `group_item` in a call to
+        group_fn(slot, items), which returns one outcome per item: the
+        job's result, or the exception that failed it.
+        """
+        tenant = tenant or "default"
+        with self._cond:
+            active = {e.tenant for e in self._pending} | \
+                     {e.tenant for batch in self._running.values() for e in batch}
+            if tenant not in active:
+                # Returning from idle (or new): no credit for the idle time.
+                floor = min((self._usage[t] for t in active), default=0.0)
+                self._usage[tenant] = max(self._usage.get(tenant, 0.0), floor)
+            entry = _Entry(
+                next(self._seq), job_id, priority, tenant, cost, fn,
+                group_key, group_item, group_fn
+            )
+            self._pending.append(entry)
+            QUEUE_DEPTH.set(len(self._pending))
+            self._cond.notify()
+        return entry.future
+
+    def _take(self):
+        """Remove and return the next batch of entries."""
+        entry = min(
+            self._pending,
+            key=lambda e: (-e.priority, self._usage[e.tenant], e.seq)
+        )
+        batch = [entry]
+        if entry.group_key is not None:
+            members = [e for e in self._pending if e.group_key == entry.group_key and e is not entry]
+            # Slots not running anything, including the caller's.
+            free = self.slots - len(self._running)
+            size = min(self.group_size, -(-(len(members) + 1) // free))
+            batch += members[:size - 1]
+        for e in batch:
+            self._pending.remove(e)
+            self._usage[e.tenant] += e.cost
+        QUEUE_DEPTH.set(len(self._pending))
+        return batch
+
+    def _slot_loop(self, slot):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                batch = self._take()
+                self._running[slot] = batch
+                BUSY_SLOTS.set(len(self._running))
+            now = time.monotonic()
+            for entry in batch:
+                WAIT_SECONDS.observe(now - entry.enqueued_at)
+            GROUP_SIZE.observe(len(batch))
+            try:
+                if len(batch) == 1:
+                    self._run_single(batch[0], slot)
+                else:
+                    self._run_group(batch, slot)
+            finally:
+                with self._cond:
+                    del self._running[slot]
+                    BUSY_SLOTS.set(len(self._running))
+
+    def _run_single(self, entry, slot):
+        try:
+            entry.future.set_result(entry.fn(slot))
+        except Exception as e:
+            entry.future.set_exception(e)
+
+    def _run_group(self, batch, slot):
+        try:
+            outcomes = batch[0].group_fn(slot, [e.group_item for e in batch])
+        except Exception as e:
+            outcomes = [e] * len(batch)
+        for entry, outcome in zip(batch, outcomes):
+            if isinstance(outcome, Exception):
+                entry.future.set_exception(outcome)
+            else:
+                entry.future.set_result(outcome)
+
+    def stats(self):
+        now = time.monotonic()
+        with self._cond:
+            waiting = {}
+            for e in self._pending:
+                waiting[e.tenant] = waiting.get(e.tenant, 0) + 1
+            return {
+                "slots": self.slots,
+                "group_size": self.group_size,
+                "busy": len(self._running),
+                "queue_depth": len(self._pending),
+                "queued_cost": sum(e.cost for e in self._pending),
+                "oldest_wait_seconds": max((now - e.enqueued_at for e in self._pending), default=0.0),
+                "waiting_by_tenant": waiting,
+                "usage_by_tenant": dict(self._usage),
+                "running": {slot: [e.job_id for e in batch] for slot, batch in self._running.items()},
+            }
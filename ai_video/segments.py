@@ -0,0 +1,81 @@
+# segments.py
+
+import os
+import re
+import subprocess
+
+_PTS_TIME = re.compile(r"pts_time:([0-9.]+)")
+
+
+def _ffmpeg(args):
+    completed = subprocess.run(
+        ["ffmpeg", "-y", "-hide_banner", "-loglevel", "error"] + args,
+        capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"ffmpeg {' '.join(args)} failed: {completed.stderr.strip()}")
+
+
+def media_duration(path):
+    """Duration of a local media file in seconds."""
+    completed = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path],
+        capture_output=True, text=True, check=True
+    )
+    return float(completed.stdout.strip())
+
+
+def scene_cuts(video_path, threshold=0.3):
+    """
+    Timestamps (seconds) of scene changes in a video, using ffmpeg's scene
+    score on a downscaled decode.
+    """
+    completed = subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-i", video_path, "-an",
+            "-vf", f"scale=320:-2,select='gt(scene,{threshold})',showinfo",
+            "-f", "null", "-"
+        ],
+        capture_output=True, text=True
+    )
+    return [float(t) for t in _PTS_TIME.findall(completed.stderr)]
+
+
+def plan_segments(duration, segment_seconds, cuts=(), snap_seconds=0.0):
+    """
+    Split [0, duration) into windows of about `segment_seconds`. A boundary
+    moves to the nearest scene cut within `snap_seconds`, so segments switch
+    where the picture does anyway. A short remainder is folded into the last
+    window. Returns a list of (start, end).
+    """
+    boundaries = [0.0]
+    target = segment_seconds
+    while target < duration - segment_seconds / 2:
+        nearby = [c for c in cuts if abs(c - target) <= snap_seconds and c > boundaries[-1] + 1.0]
+        boundary = min(nearby, key=lambda c: abs(c - target)) if nearby else target
+        boundaries.append(boundary)
+        target = boundary + segment_seconds
+    boundaries.append(duration)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def cut_video(src, start, end, out_path):
+    """Frame-accurate cut of [start, end) without audio."""
+    _ffmpeg([
+        "-ss", f"{start:.3f}", "-i", src, "-t", f"{end - start:.3f}", "-an",
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", "18", out_path
+    ])
+
+
+def cut_audio(src, start, end, out_path):
+    _ffmpeg(["-ss", f"{start:.3f}", "-i", src, "-t", f"{end - start:.3f}", "-vn", out_path])
+
+
+def write_concat_list(segment_paths, list_path):
+    """
+    Write an ffmpeg concat demuxer list; the segments all come out of the
+    same LatentSync encode, so they can be joined with stream copy.
+    """
+    with open(list_path, "w") as f:
+        for path in segment_paths:
+            f.write(f"file '{os.path.abspath(path)}'\n")
@@ -0,0 +1,136 @@
+"""
+GpuScheduler with simulated jobs: each job records when it starts and,
+where the test needs a busy slot, blocks on an event until released.
+"""
+
+import threading
+import time
+
+from scheduler import GpuScheduler
+
+TIMEOUT = 5
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = []
+        self.groups = []
+
+    def job(self, name, gate=None, running=None):
+        def fn(slot):
+            with self.lock:
+                self.started.append(name)
+            if running is not None:
+                running.set()
+            if gate is not None:
+                assert gate.wait(TIMEOUT)
+            return name
+        return fn
+
+    def group(self, slot, items):
+        with self.lock:
+            self.groups.append((time.monotonic(), list(items)))
+            self.started.extend(items)
+        return list(items)
+
+
+def occupy(scheduler, recorder, tenant=None):
+    """Submit a job that holds its slot until the returned event is set."""
+    gate, running = threading.Event(), threading.Event()
+    future = scheduler.submit("blocker", recorder.job("blocker", gate, running), tenant=tenant)
+    assert running.wait(TIMEOUT)
+    return gate, future
+
+
+def member(scheduler, recorder, name, group_key="clip"):
+    return scheduler.submit(
+        name, recorder.job(name), group_key=group_key, group_item=name, group_fn=recorder.group
+    )
+
+
+def wait_all(futures):
+    return [f.result(TIMEOUT) for f in futures]
+
+
+def test_higher_priority_starts_first():
+    scheduler = GpuScheduler(1)
+    recorder = Recorder()
+    gate, blocker = occupy(scheduler, recorder)
+    futures = [
+        scheduler.submit(name, recorder.job(name), priority=priority)
+        for name, priority in (("low", 0), ("high", 5), ("mid", 1), ("low2", 0))
+    ]
+    gate.set()
+    wait_all([blocker] + futures)
+    assert recorder.started == ["blocker", "high", "mid", "low", "low2"]
+
+
+def test_tenants_share_the_slot():
+    scheduler = GpuScheduler(1)
+    recorder = Recorder()
+    gate, blocker = occupy(scheduler, recorder, tenant="a")
+    futures = [scheduler.submit(name, recorder.job(name), tenant="a") for name in ("a1", "a2", "a3")]
+    futures += [scheduler.submit(name, recorder.job(name), tenant="b") for name in ("b1", "b2")]
+    gate.set()
+    wait_all([blocker] + futures)
+    assert recorder.started == ["blocker", "a1", "b1", "a2", "b2", "a3"]
+
+
+def test_tenant_returning_from_idle_gets_no_credit():
+    scheduler = GpuScheduler(1)
+    recorder = Recorder()
+    wait_all([scheduler.submit("b0", recorder.job("b0"), tenant="b")])
+    wait_all([scheduler.submit(f"a{i}", recorder.job(f"a{i}"), tenant="a") for i in range(5)])
+
+    # b was idle while a ran five jobs; it comes back level with a rather
+    # than five jobs ahead.
+    gate, blocker = occupy(scheduler, recorder, tenant="a")
+    recorder.started.clear()
+    futures = [scheduler.submit(name, recorder.job(name), tenant="a") for name in ("x1", "x2")]
+    futures += [scheduler.submit(name, recorder.job(name), tenant="b") for name in ("y1", "y2")]
+    assert scheduler.stats()["usage_by_tenant"] == {"a": 6.0, "b": 6.0}
+    gate.set()
+    wait_all([blocker] + futures)
+    assert recorder.started == ["x1", "y1", "x2", "y2"]
+
+
+def test_group_is_spread_over_free_slots():
+    scheduler = GpuScheduler(2, group_size=4)
+    recorder = Recorder()
+    both_running = threading.Barrier(2, timeout=TIMEOUT)
+
+    def group_fn(slot, items):
+        recorder.group(slot, items)
+        both_running.wait()
+        return list(items)
+
+    # Queue the whole group before either idle slot can look at it.
+    with scheduler._cond:
+        futures = [
+            scheduler.submit(f"m{i}", None, group_key="clip", group_item=f"m{i}", group_fn=group_fn)
+            for i in range(4)
+        ]
+    assert wait_all(futures) == ["m0", "m1", "m2", "m3"]
+    assert sorted(len(items) for _, items in recorder.groups) == [2, 2]
+
+
+def test_group_fills_up_when_one_slot_is_free():
+    scheduler = GpuScheduler(1, group_size=4)
+    recorder = Recorder()
+    gate, blocker = occupy(scheduler, recorder)
+    futures = [member(scheduler, recorder, f"m{i}") for i in range(5)]
+    gate.set()
+    wait_all([blocker] + futures)
+    # The fifth member is left alone and runs as a plain job.
+    assert [items for _, items in recorder.groups] == [["m0", "m1", "m2", "m3"]]
+    assert recorder.started == ["blocker", "m0", "m1", "m2", "m3", "m4"]
+
+
+def test_lone_group_member_starts_at_once():
+    scheduler = GpuScheduler(1, group_size=3)
+    recorder = Recorder()
+    start = time.monotonic()
+    assert member(scheduler, recorder, "m0").result(TIMEOUT) == "m0"
+    assert time.monotonic() - start < 1
+    assert recorder.groups == []
@@ -0,0 +1,78 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+
+import psycopg2
+
+CHANNEL = "job_status"
+
+
+class JobEvents:
+    """
+    One LISTEN connection per API process, fed by the jobs_status_notify
+    trigger, fanned out to per-job asyncio queues. Subscribers receive the
+    trigger's JSON payloads; after a reconnect every subscriber receives
+    {"resync": True}, since notifications sent while disconnected are lost.
+    """
+
+    def __init__(self, dsn):
+        self.dsn = dsn
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._loop = None
+        self._stop = threading.Event()
+
+    def start(self, loop):
+        self._loop = loop
+        threading.Thread(target=self._listen_loop, daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def subscribe(self, job_id):
+        queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers.setdefault(job_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, job_id, queue):
+        with self._lock:
+            queues = self._subscribers.get(job_id)
+            if queues:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[job_id]
+
+    def _dispatch(self, job_id, event):
+        with self._lock:
+            queues = list(self._subscribers.get(job_id, ())) if job_id is not None else \
+                [q for qs in self._subscribers.values() for q in qs]
+        for queue in queues:
+            self._loop.call_soon_threadsafe(queue.put_nowait, event)
+
+    def _listen_loop(self):
+        connected_before = False
+        while not self._stop.is_set():
+            try:
+                conn = psycopg2.connect(self.dsn)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {CHANNEL}")
+                if connected_before:
+                    self._dispatch(None, {"resync": True})
+                connected_before = True
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 5) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        event = json.loads(notify.payload)
+                        self._dispatch(event["id"], event)
+                conn.close()
+            except Exception as e:
+                logging.error(f"Job event listener failed: {e}, reconnecting")
+                time.sleep(3)
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Enum, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from .database import Base
 
@@ -10,8 +11,34 @@ class JobStatus:
     COMPLETED = "COMPLETED"
     FAILED = "FAILED"
 
+# Jobs that are still moving through the pipeline; the partial index over
+# them stays small however many finished jobs accumulate.
+ACTIVE_STATUSES = (
+    JobStatus.SUBMITTED,
+    JobStatus.PROCESSING_AUDIO,
+    JobStatus.AUDIO_COMPLETE,
+    JobStatus.PROCESSING_VIDEO,
+)
+
 class Job(Base):
     __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_jobs_created_at_id", "created_at", "id"),
+        Index(
+            "ix_jobs_active_status",
+            "status", "updated_at",
+            postgresql_where=text(
+                "status IN ('SUBMITTED', 'PROCESSING_AUDIO', 'AUDIO_COMPLETE', 'PROCESSING_VIDEO')"
+            )
+        ),
+        Index("ix_jobs_fingerprint", "fingerprint", "id"),
+        Index(
+            "ix_jobs_coalesced_into",
+            "coalesced_into",
+            postgresql_where=text("coalesced_into IS NOT NULL")
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     status = Column(String, default=JobStatus.SUBMITTED)
@@ -21,4 +48,16 @@ class Job(Base):
     path_minio_audio_input = Column(String)  
     path_minio_audio = Column(String)       
     path_minio_video_input = Column(String)  
-    path_minio_video_output = Column(String)
\ No newline at end of file
+    path_minio_video_output = Column(String)
+    audio_format = Column(String)
+    priority = Column(Integer, default=0)
+    tenant = Column(String)
+    fingerprint = Column(String)
+    coalesced_into = Column(Integer)
+    claimed_by = Column(String)
+    lease_expires_at = Column(DateTime(timezone=True))
+    audio_started_at = Column(DateTime(timezone=True))
+    audio_completed_at = Column(DateTime(timezone=True))
+    video_started_at = Column(DateTime(timezone=True))
+    video_completed_at = Column(DateTime(timezone=True))
+    stage_timings = Column(JSONB)
\ No newline at end of file
@@ -0,0 +1,196 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import pika
+
+
+class _Uncommitted(Exception):
+    """The connection failed before tx.commit was sent; nothing was enqueued."""
+
+
+class JobPublisher:
+    """
+    Long-lived, thread-safe RabbitMQ publisher.
+
+    pika connections are not thread-safe, so the publisher keeps a pool of
+    up to `pool_size` connections, each with one channel, and hands a whole
+    connection to one caller at a time. Channels run in transaction mode:
+    a group of messages is published and then committed, so it returns
+    once the broker has accepted all of them, after one round trip for the
+    whole group (publisher confirms on a BlockingChannel wait for each
+    message in turn). Messages the broker cannot route fail the publish.
+
+    With `batch_window` > 0, publish() queues the message and a background
+    thread flushes everything collected within that window (up to
+    `batch_max` messages) in one transaction; publish() gives up after
+    `publish_timeout` seconds.
+    """
+
+    def __init__(self, url: str, queue_name: str = "job_queue", pool_size: int = 4,
+                 batch_window: float = 0.0, batch_max: int = 100, publish_timeout: float = 30.0):
+        self.url = url
+        self.queue_name = queue_name
+        self.pool_size = pool_size
+        self.batch_window = batch_window
+        self.batch_max = batch_max
+        self.publish_timeout = publish_timeout
+
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._pending = queue.Queue()
+        self._closed = False
+        self._batcher = None
+        if batch_window > 0:
+            self._batcher = threading.Thread(target=self._batch_loop, daemon=True)
+            self._batcher.start()
+
+    def _connect(self):
+        connection = pika.BlockingConnection(pika.URLParameters(self.url))
+        channel = connection.channel()
+        channel.queue_declare(queue=self.queue_name)
+        channel.tx_select()
+        returned = []
+        channel.add_on_return_callback(lambda ch, method, properties, body: returned.append(body))
+        return connection, channel, returned
+
+    def _checkout(self):
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    connection, channel, returned = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._connect()
+                try:
+                    # Services heartbeats that piled up while the connection sat idle.
+                    connection.process_data_events(time_limit=0)
+                    if channel.is_open:
+                        return connection, channel, returned
+                except pika.exceptions.AMQPError:
+                    pass
+                self._discard(connection)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _checkin(self, connection, channel, returned):
+        self._idle.put((connection, channel, returned))
+        self._slots.release()
+
+    def _discard(self, connection):
+        try:
+            if connection.is_open:
+                connection.close()
+        except pika.exceptions.AMQPError:
+            pass
+
+    def _publish_bodies(self, bodies):
+        connection, channel, returned = self._checkout()
+        try:
+            for attempt in range(2):
+                try:
+                    self._publish_transaction(connection, channel, returned, bodies)
+                    break
+                except _Uncommitted as e:
+                    if attempt:
+                        raise e.__cause__
+                    # The broker drops a transaction that was never
+                    # committed, so the whole group is published again. Once
+                    # tx.commit has gone out there is no retry: the broker
+                    # may have applied it before the connection dropped.
+                    logging.warning("RabbitMQ publisher connection lost, reconnecting")
+                    self._discard(connection)
+                    connection, channel, returned = self._connect()
+        except Exception:
+            self._discard(connection)
+            self._slots.release()
+            raise
+        self._checkin(connection, channel, returned)
+
+    def _publish_transaction(self, connection, channel, returned, bodies):
+        del returned[:]
+        try:
+            for body in bodies:
+                channel.basic_publish(
+                    exchange="",
+                    routing_key=self.queue_name,
+                    body=body,
+                    mandatory=True
+                )
+        except (pika.exceptions.AMQPConnectionError, pika.exceptions.AMQPChannelError) as e:
+            raise _Uncommitted() from e
+        channel.tx_commit()
+        # The broker sends basic.return before tx.commit-ok; deliver them.
+        connection.process_data_events(time_limit=0)
+        if returned:
+            raise RuntimeError(f"RabbitMQ could not route {len(returned)} of {len(bodies)} job messages")
+
+    def _batch_loop(self):
+        while not self._closed:
+            try:
+                batch = [self._pending.get(timeout=1)]
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.batch_max:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._publish_bodies([body for body, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for _, future in batch:
+                    future.set_result(None)
+
+    def publish(self, job_id: int):
+        if self._closed:
+            raise RuntimeError("JobPublisher is closed")
+        body = str(job_id)
+        if self._batcher is None:
+            self._publish_bodies([body])
+            return
+        future = Future()
+        self._pending.put((body, future))
+        future.result(timeout=self.publish_timeout)
+
+    def warm(self):
+        """Open one pooled connection ahead of the first publish."""
+        self._checkin(*self._checkout())
+
+    def publish_many(self, job_ids):
+        """
+        Publish many jobs on one channel, one transaction (and broker round
+        trip) per `batch_max` messages.
+        """
+        bodies = [str(job_id) for job_id in job_ids]
+        for start in range(0, len(bodies), self.batch_max):
+            self._publish_bodies(bodies[start:start + self.batch_max])
+
+    def close(self):
+        """
+        Close the idle connections and fail the messages still waiting for
+        the batcher; a batch already being published completes.
+        """
+        self._closed = True
+        while True:
+            try:
+                _, future = self._pending.get_nowait()
+            except queue.Empty:
+                break
+            future.set_exception(RuntimeError("JobPublisher closed before the job was published"))
+        while True:
+            try:
+                connection, _, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(connection)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Dict, List, Any
 
 class JobCreate(BaseModel):
     text_content: str
@@ -15,6 +15,29 @@ class JobResponse(BaseModel):
     path_minio_audio: Optional[str]
     path_minio_video_input: Optional[str]
     path_minio_video_output: Optional[str]
+    audio_format: Optional[str] = None
+    priority: Optional[int] = None
+    tenant: Optional[str] = None
+    coalesced_into: Optional[int] = None
+
+    audio_started_at: Optional[datetime] = None
+    audio_completed_at: Optional[datetime] = None
+    video_started_at: Optional[datetime] = None
+    video_completed_at: Optional[datetime] = None
+    stage_timings: Optional[Dict[str, float]] = None
+
+    # Presigned download URLs, set when MINIO_PUBLIC_URL is configured;
+    # otherwise results are served by /jobs/{id}/video and /jobs/{id}/audio.
+    video_output_url: Optional[str] = None
+    audio_url: Optional[str] = None
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+class JobPage(BaseModel):
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[int] = None
+
+
+class JobBatchResponse(BaseModel):
+    job_ids: List[int]
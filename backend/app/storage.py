@@ -0,0 +1,167 @@
+import os
+import time
+import hashlib
+import uuid
+import threading
+from datetime import timedelta
+from io import BytesIO
+from urllib.parse import urlparse
+
+import urllib3
+from fastapi import UploadFile
+from minio import Minio
+
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+UPLOAD_PART_SIZE = max(int(os.getenv("UPLOAD_PART_SIZE", str(8 * 1024 * 1024))), MIN_PART_SIZE)
+UPLOAD_PARALLEL_PARTS = int(os.getenv("UPLOAD_PARALLEL_PARTS", "2"))
+# Both default to nginx's client_max_body_size (100M): MAX_REQUEST_SIZE caps
+# a job submission's whole body before it is parsed, MAX_UPLOAD_SIZE each
+# file streamed on to MinIO.
+MAX_REQUEST_SIZE = int(os.getenv("MAX_REQUEST_SIZE", str(100 * 1024 * 1024)))
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(MAX_REQUEST_SIZE)))
+
+# The client's own pool keeps 10 connections, fewer than the API's io
+# threads (and their parallel parts) use at once; the surplus connections
+# were opened and discarded on every upload.
+MINIO_POOL_SIZE = int(os.getenv("MINIO_POOL_SIZE", "64"))
+
+minio_client = Minio(
+    os.getenv("MINIO_URL", "minio:9000").replace("http://", "").replace("https://", ""),
+    access_key=os.getenv("MINIO_ACCESS_KEY", "minio"),
+    secret_key=os.getenv("MINIO_SECRET_KEY", "minio123"),
+    secure=False,
+    http_client=urllib3.PoolManager(
+        timeout=urllib3.util.Timeout(connect=300, read=300),
+        maxsize=MINIO_POOL_SIZE,
+        retries=urllib3.Retry(total=5, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504])
+    )
+)
+
+# Browsers reach MinIO at MINIO_PUBLIC_URL rather than the internal
+# MINIO_URL. Presigned URLs are signed for that host; the region is given so
+# signing does not need a request to MinIO. Without MINIO_PUBLIC_URL, results
+# are only served through the API.
+MINIO_PUBLIC_URL = os.getenv("MINIO_PUBLIC_URL")
+PRESIGN_EXPIRY = int(os.getenv("PRESIGN_EXPIRY_SECONDS", "3600"))
+PRESIGN_REFRESH_MARGIN = int(os.getenv("PRESIGN_REFRESH_MARGIN_SECONDS", "300"))
+
+public_client = None
+if MINIO_PUBLIC_URL:
+    _public = urlparse(MINIO_PUBLIC_URL)
+    public_client = Minio(
+        _public.netloc,
+        access_key=os.getenv("MINIO_ACCESS_KEY", "minio"),
+        secret_key=os.getenv("MINIO_SECRET_KEY", "minio123"),
+        secure=_public.scheme == "https",
+        region=os.getenv("MINIO_REGION", "us-east-1")
+    )
+
+_presigned = {}
+_presigned_lock = threading.Lock()
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class LimitedReader:
+    """
+    File-like wrapper that counts the bytes read from `fileobj` and raises
+    UploadTooLarge once more than `max_size` bytes have been consumed. The
+    bytes are hashed as they pass, for job fingerprints.
+    """
+
+    def __init__(self, fileobj, max_size: int):
+        self.fileobj = fileobj
+        self.max_size = max_size
+        self.bytes_read = 0
+        self.sha256 = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.fileobj.read(size)
+        self.bytes_read += len(data)
+        self.sha256.update(data)
+        if self.bytes_read > self.max_size:
+            raise UploadTooLarge(f"upload exceeds {self.max_size} bytes")
+        return data
+
+
+def ensure_buckets(buckets):
+    for bucket in buckets:
+        if not minio_client.bucket_exists(bucket):
+            minio_client.make_bucket(bucket)
+
+
+def put_text(bucket: str, object_name: str, content: str) -> str:
+    data = content.encode("utf-8")
+    minio_client.put_object(bucket, object_name, BytesIO(data), len(data))
+    return f"{bucket}/{object_name}"
+
+
+def put_upload(bucket: str, prefix: str, upload: UploadFile):
+    """
+    Stream an UploadFile to MinIO as a multipart upload without reading it
+    into memory; at most (UPLOAD_PARALLEL_PARTS + 1) parts are buffered.
+    Blocking, so call it from a worker thread.
+    Returns the "bucket/object_name" path and the SHA-256 of the content.
+    """
+    ext = os.path.splitext(upload.filename or "")[1]
+    object_name = f"{prefix}-{uuid.uuid4()}{ext}"
+    upload.file.seek(0)
+    reader = LimitedReader(upload.file, MAX_UPLOAD_SIZE)
+    minio_client.put_object(
+        bucket,
+        object_name,
+        reader,
+        length=-1,
+        content_type=upload.content_type,
+        part_size=UPLOAD_PART_SIZE,
+        num_parallel_uploads=UPLOAD_PARALLEL_PARTS
+    )
+    return f"{bucket}/{object_name}", reader.sha256.hexdigest()
+
+
+def remove(paths):
+    for path in paths:
+        bucket, object_name = path.split("/", 1)
+        minio_client.remove_object(bucket, object_name)
+
+
+def presigned_url(path: str):
+    """
+    Short-lived presigned GET URL for "bucket/object_name", reused until it
+    is within PRESIGN_REFRESH_MARGIN seconds of expiring so repeated polls
+    hand out the same URL and browsers keep their cached copy. None when
+    MINIO_PUBLIC_URL is not set.
+    """
+    if public_client is None or not path:
+        return None
+    now = time.time()
+    with _presigned_lock:
+        cached = _presigned.get(path)
+        if cached and cached[1] - now > PRESIGN_REFRESH_MARGIN:
+            return cached[0]
+    bucket, object_name = path.split("/", 1)
+    url = public_client.presigned_get_object(bucket, object_name, expires=timedelta(seconds=PRESIGN_EXPIRY))
+    with _presigned_lock:
+        if len(_presigned) > 10000:
+            _presigned.clear()
+        _presigned[path] = (url, now + PRESIGN_EXPIRY)
+    return url
+
+
+def stat_object(path: str):
+    bucket, object_name = path.split("/", 1)
+    return minio_client.stat_object(bucket, object_name)
+
+
+def iter_object(path: str, offset: int = 0, length: int = 0, chunk_size: int = 1024 * 1024):
+    """Yield the bytes of "bucket/object_name" (or a range of it) in chunks."""
+    bucket, object_name = path.split("/", 1)
+    response = minio_client.get_object(bucket, object_name, offset=offset, length=length)
+    try:
+        yield from response.stream(chunk_size)
+    finally:
+        response.close()
+        response.release_conn()
@@ -0,0 +1,92 @@
+import logging
+import os
+import threading
+import time
+
+from prometheus_client import Gauge
+
+STARTUP_PHASE_SECONDS = Gauge("startup_phase_seconds", "Duration of each startup phase", ["phase"])
+
+
+def process_started():
+    """
+    time.monotonic() value at which this process was started, read from
+    /proc so it does not depend on when this module is imported. Falls
+    back to the current time where /proc is not available.
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the parenthesised command name; starttime is the 22nd.
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        age = uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.monotonic()
+    return time.monotonic() - max(age, 0.0)
+
+
+BOOT_STARTED = process_started()
+
+
+class Warmup:
+    """
+    Runs the slow part of service startup in the background so the process
+    accepts connections (and answers /healthz) right away. Phases run in
+    order; a failing phase is retried with exponential backoff instead of
+    crashing the process. `ready` turns true after the last phase.
+    """
+
+    def __init__(self, phases, retry_delay=1.0, max_retry_delay=30.0):
+        self.phases = phases
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.ready = False
+        self._state = {
+            name: {"state": "pending", "attempts": 0, "seconds": None, "error": None}
+            for name, _ in phases
+        }
+        self._import_seconds = round(time.monotonic() - BOOT_STARTED, 3)
+        self._ready_seconds = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        for name, fn in self.phases:
+            state = self._state[name]
+            delay = self.retry_delay
+            start = time.monotonic()
+            while True:
+                with self._lock:
+                    state["state"] = "running"
+                    state["attempts"] += 1
+                try:
+                    fn()
+                    break
+                except Exception as e:
+                    logging.warning(f"Startup phase {name} failed (attempt {state['attempts']}): {e}, retrying in {delay}s")
+                    with self._lock:
+                        state["state"] = "retrying"
+                        state["error"] = str(e)
+                    time.sleep(delay)
+                    delay = min(delay * 2, self.max_retry_delay)
+            elapsed = time.monotonic() - start
+            STARTUP_PHASE_SECONDS.labels(name).set(elapsed)
+            with self._lock:
+                state.update(state="done", seconds=round(elapsed, 3), error=None)
+            logging.info(f"Startup phase {name} done in {elapsed:.2f}s")
+        self._ready_seconds = round(time.monotonic() - BOOT_STARTED, 3)
+        STARTUP_PHASE_SECONDS.labels("total").set(self._ready_seconds)
+        self.ready = True
+        logging.info(f"Ready {self._ready_seconds}s after boot")
+
+    def status(self):
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "import_seconds": self._import_seconds,
+                "ready_seconds": self._ready_seconds,
+                "phases": {name: dict(state) for name, state in self._state.items()},
+            }
@@ -0,0 +1,85 @@
+"""
+POST /jobs/ as it was before the blocking clients moved off the event
+loop, for bench.submit_load to compare against: MinIO uploads, the
+Session and a fresh RabbitMQ connection all run inside the async handler.
+
+    uvicorn bench.baseline_api:app
+"""
+
+import os
+import uuid
+from io import BytesIO
+
+import pika
+from fastapi import Depends, FastAPI, File, Form, HTTPException, UploadFile, status
+from sqlalchemy.orm import Session
+
+from app import database, models, schemas
+from app.storage import minio_client
+
+app = FastAPI()
+
+
+def get_db():
+    db = database.SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def publish_job(job_id: int):
+    connection = pika.BlockingConnection(pika.URLParameters(os.environ["RABBITMQ_URL"]))
+    channel = connection.channel()
+    channel.queue_declare(queue="job_queue")
+    channel.basic_publish(exchange="", routing_key="job_queue", body=str(job_id))
+    connection.close()
+
+
+@app.get("/readyz")
+def readyz():
+    return {"ready": True}
+
+
+@app.post("/jobs/", response_model=schemas.JobResponse, status_code=status.HTTP_201_CREATED)
+async def create_job(
+    text_content: str = Form(None),
+    audio_file: UploadFile = File(None),
+    video_file: UploadFile = File(None),
+    db: Session = Depends(get_db)
+):
+    if not text_content and not audio_file:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one of text or audio must be provided"
+        )
+
+    text_path = None
+    if text_content:
+        text_filename = f"text-{uuid.uuid4()}.txt"
+        text_path = f"texts/{text_filename}"
+        data = text_content.encode("utf-8")
+        minio_client.put_object("texts", text_filename, BytesIO(data), len(data))
+
+    uploads = {}
+    for bucket, prefix, upload in (("audios", "audio-input", audio_file), ("videos", "video-input", video_file)):
+        if upload:
+            ext = os.path.splitext(upload.filename)[1]
+            object_name = f"{prefix}-{uuid.uuid4()}{ext}"
+            data = await upload.read()
+            minio_client.put_object(bucket, object_name, BytesIO(data), len(data))
+            uploads[bucket] = f"{bucket}/{object_name}"
+
+    db_job = models.Job(
+        path_minio_text=text_path,
+        path_minio_audio_input=uploads.get("audios"),
+        path_minio_video_input=uploads.get("videos")
+    )
+    db.add(db_job)
+    db.commit()
+    db.refresh(db_job)
+    if db_job.updated_at is None:
+        db_job.updated_at = db_job.created_at
+
+    publish_job(db_job.id)
+    return db_job
@@ -0,0 +1,96 @@
+"""
+Publishes/sec of JobPublisher against an in-process AMQP stand-in, next to
+the per-request connection it replaced and a confirm-per-message channel.
+
+The stand-in delays each reply by --rtt to stand in for a broker across
+the network; every approach pays that per round trip it waits on.
+
+Run from backend/:
+
+    python -m bench.publisher
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pika
+
+from app.publisher import JobPublisher
+from bench.standins import AmqpBroker
+
+QUEUE = "job_queue"
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument("--messages", type=int, default=2000)
+parser.add_argument("--threads", type=int, default=32, help="concurrent publishing callers")
+parser.add_argument("--window", type=float, default=2.0, help="batch window, ms")
+parser.add_argument("--rtt", type=float, default=1.0, help="broker round trip, ms")
+args = parser.parse_args()
+
+
+class ConnectionPerPublish:
+    """publish_job before the pool: a new connection for every message."""
+
+    def __init__(self, url):
+        self.url = url
+
+    def publish(self, job_id):
+        connection = pika.BlockingConnection(pika.URLParameters(self.url))
+        channel = connection.channel()
+        channel.queue_declare(queue=QUEUE)
+        channel.basic_publish(exchange="", routing_key=QUEUE, body=str(job_id))
+        connection.close()
+
+    def close(self):
+        pass
+
+
+class ConfirmPerMessage(JobPublisher):
+    """The same pool with channels in confirm mode, acked one message at a time."""
+
+    def _connect(self):
+        connection = pika.BlockingConnection(pika.URLParameters(self.url))
+        channel = connection.channel()
+        channel.queue_declare(queue=self.queue_name)
+        channel.confirm_delivery()
+        return connection, channel, []
+
+    def _publish_transaction(self, connection, channel, returned, bodies):
+        for body in bodies:
+            channel.basic_publish(exchange="", routing_key=self.queue_name, body=body, mandatory=True)
+
+
+def run(broker, name, publisher, many=False):
+    before = broker.published(QUEUE)
+    start = time.perf_counter()
+    if many:
+        publisher.publish_many(range(args.messages))
+    else:
+        with ThreadPoolExecutor(args.threads) as pool:
+            list(pool.map(publisher.publish, range(args.messages)))
+    elapsed = time.perf_counter() - start
+    publisher.close()
+    delivered = broker.published(QUEUE) - before
+    assert delivered == args.messages, f"{name}: broker got {delivered} of {args.messages}"
+    print(f"{name:<48} {args.messages / elapsed:9.0f} publishes/s")
+
+
+def main():
+    broker = AmqpBroker(rtt=args.rtt / 1000)
+    url = broker.url
+    print(f"{args.messages} messages, {args.threads} callers, {args.rtt} ms broker round trip")
+    try:
+        run(broker, "publish, connection per message (before)", ConnectionPerPublish(url))
+        run(broker, "publish, pooled, confirm mode", ConfirmPerMessage(url))
+        run(broker, "publish, pooled, tx mode", JobPublisher(url))
+        run(broker, f"publish, pooled, tx mode, {args.window} ms window",
+            JobPublisher(url, batch_window=args.window / 1000))
+        run(broker, "publish_many, confirm mode", ConfirmPerMessage(url), many=True)
+        run(broker, "publish_many, tx mode", JobPublisher(url), many=True)
+    finally:
+        broker.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+In-process stand-ins for the services the API talks to, for benchmarks.
+
+They speak just enough of each protocol for the API's own clients and add
+a fixed delay to every reply a client waits on, so round trips cost what
+they would over a network instead of nearly nothing on loopback.
+"""
+
+import hashlib
+import socket
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from pika import frame, spec
+
+SERVER_CAPABILITIES = {
+    "publisher_confirms": True,
+    "basic.nack": True,
+    "consumer_cancel_notify": True,
+    "exchange_exchange_bindings": True,
+    "connection.blocked": True,
+    "authentication_failure_close": True,
+}
+
+
+class _AmqpConnection(socketserver.BaseRequestHandler):
+    """One client connection: handshake, channels, queues and publishes."""
+
+    def setup(self):
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.buffer = b""
+        self.confirming = set()
+        self.delivery_tags = {}
+        # channel -> [publish method, expected body size, body so far]
+        self.content = {}
+
+    def reply(self, channel, method):
+        self.send(frame.Method(channel, method).marshal())
+
+    def send(self, data):
+        if self.server.rtt:
+            time.sleep(self.server.rtt)
+        self.request.sendall(data)
+
+    def handle(self):
+        while True:
+            data = self.request.recv(65536)
+            if not data:
+                return
+            self.buffer += data
+            while True:
+                consumed, received = frame.decode_frame(self.buffer)
+                if not consumed:
+                    break
+                self.buffer = self.buffer[consumed:]
+                if self.dispatch(received) is False:
+                    return
+
+    def dispatch(self, received):
+        if isinstance(received, frame.ProtocolHeader):
+            self.reply(0, spec.Connection.Start(
+                server_properties={"product": "bench", "capabilities": SERVER_CAPABILITIES}
+            ))
+        elif isinstance(received, frame.Method):
+            return self.method(received.channel_number, received.method)
+        elif isinstance(received, frame.Header):
+            self.content[received.channel_number][1] = received.body_size
+            self.deliver_if_complete(received.channel_number)
+        elif isinstance(received, frame.Body):
+            self.content[received.channel_number][2] += received.fragment
+            self.deliver_if_complete(received.channel_number)
+
+    def method(self, channel, method):
+        if isinstance(method, spec.Connection.StartOk):
+            self.reply(0, spec.Connection.Tune(channel_max=2047, frame_max=131072, heartbeat=0))
+        elif isinstance(method, spec.Connection.Open):
+            self.reply(0, spec.Connection.OpenOk())
+        elif isinstance(method, spec.Connection.Close):
+            self.reply(0, spec.Connection.CloseOk())
+            return False
+        elif isinstance(method, spec.Channel.Open):
+            self.reply(channel, spec.Channel.OpenOk())
+        elif isinstance(method, spec.Channel.Close):
+            self.confirming.discard(channel)
+            self.reply(channel, spec.Channel.CloseOk())
+        elif isinstance(method, spec.Queue.Declare):
+            with self.server.lock:
+                self.server.queues.setdefault(method.queue, 0)
+            if not method.nowait:
+                self.reply(channel, spec.Queue.DeclareOk(queue=method.queue, message_count=0, consumer_count=0))
+        elif isinstance(method, spec.Tx.Select):
+            self.reply(channel, spec.Tx.SelectOk())
+        elif isinstance(method, spec.Tx.Commit):
+            self.reply(channel, spec.Tx.CommitOk())
+        elif isinstance(method, spec.Confirm.Select):
+            self.confirming.add(channel)
+            self.delivery_tags[channel] = 0
+            if not method.nowait:
+                self.reply(channel, spec.Confirm.SelectOk())
+        elif isinstance(method, spec.Basic.Publish):
+            self.content[channel] = [method, None, b""]
+        # Anything else a benchmark sends is acknowledged by silence.
+
+    def deliver_if_complete(self, channel):
+        method, size, body = self.content[channel]
+        if size is None or len(body) < size:
+            return
+        del self.content[channel]
+        with self.server.lock:
+            routed = method.routing_key in self.server.queues
+            if routed:
+                self.server.queues[method.routing_key] += 1
+        if not routed and method.mandatory:
+            self.request.sendall(
+                frame.Method(channel, spec.Basic.Return(
+                    reply_code=312, reply_text="NO_ROUTE", exchange=method.exchange,
+                    routing_key=method.routing_key
+                )).marshal()
+                + frame.Header(channel, len(body), spec.BasicProperties()).marshal()
+                + frame.Body(channel, body).marshal()
+            )
+        if channel in self.confirming:
+            self.delivery_tags[channel] += 1
+            self.reply(channel, spec.Basic.Ack(delivery_tag=self.delivery_tags[channel]))
+
+
+class AmqpBroker(socketserver.ThreadingTCPServer):
+    """
+    A RabbitMQ stand-in on localhost. It accepts any credentials, counts
+    the messages routed to each declared queue and returns unroutable
+    mandatory ones, in transaction or confirm mode. Nothing is delivered
+    to consumers.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, rtt: float = 0.0):
+        super().__init__(("127.0.0.1", 0), _AmqpConnection)
+        self.rtt = rtt
+        self.lock = threading.Lock()
+        self.queues = {}
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        host, port = self.server_address
+        return f"amqp://guest:guest@{host}:{port}/%2F?heartbeat=0"
+
+    def published(self, queue_name):
+        with self.lock:
+            return self.queues.get(queue_name, 0)
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _S3Request(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Responses are written in two sends (headers, then body); without
+    # TCP_NODELAY the second one waits for the client's delayed ACK.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def respond(self, code, body=b"", headers=None):
+        if self.server.rtt:
+            time.sleep(self.server.rtt)
+        self.send_response(code)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def target(self):
+        url = urlsplit(self.path)
+        bucket, _, key = url.path.lstrip("/").partition("/")
+        return bucket, key, url.query
+
+    def do_GET(self):
+        bucket, key, query = self.target()
+        if not key and "location" in query:
+            self.respond(200, b'<?xml version="1.0" encoding="UTF-8"?>'
+                              b'<LocationConstraint xmlns="http://s3.amazonaws.com/doc/2006-03-01/"/>')
+        else:
+            self.respond(501)
+
+    def do_HEAD(self):
+        bucket, key, _ = self.target()
+        with self.server.lock:
+            found = bucket in self.server.buckets if not key else (bucket, key) in self.server.objects
+        self.respond(200 if found else 404)
+
+    def do_PUT(self):
+        bucket, key, query = self.target()
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if query:
+            self.respond(501)
+            return
+        with self.server.lock:
+            if not key:
+                self.server.buckets.add(bucket)
+            else:
+                self.server.objects[bucket, key] = len(body)
+        self.respond(200, headers={"ETag": '"%s"' % hashlib.md5(body).hexdigest()})
+
+    def do_DELETE(self):
+        bucket, key, _ = self.target()
+        with self.server.lock:
+            self.server.objects.pop((bucket, key), None)
+        self.respond(204)
+
+
+class S3Server(ThreadingHTTPServer):
+    """
+    A MinIO stand-in on localhost: buckets, single-request PUTs, HEAD and
+    DELETE, with object sizes kept in memory. Signatures are not checked
+    and multipart uploads are refused, so uploads must stay under the
+    client's part size.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, rtt: float = 0.0):
+        super().__init__(("127.0.0.1", 0), _S3Request)
+        self.rtt = rtt
+        self.lock = threading.Lock()
+        self.buckets = set()
+        self.objects = {}
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def endpoint(self):
+        host, port = self.server_address
+        return f"{host}:{port}"
+
+    def close(self):
+        self.shutdown()
+        self.server_close()